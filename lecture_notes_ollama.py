@@ -1,30 +1,25 @@
 import argparse
+import asyncio
+import contextlib
+import hashlib
 import pathlib
-import requests
+import re
+import string
+from collections.abc import Callable
 
+import aiohttp
+import numpy as np
 
-# =========================
-# Ollama client
-# =========================
-
-def call_ollama(prompt: str,
-                model: str = "llama3.1",
-                host: str = "http://localhost:11434") -> str:
-    """
-    Call a local Ollama model with the given prompt and return the response text.
-    Requires Ollama to be installed and running.
-    """
-    url = f"{host}/api/generate"
-    payload = {
-        "model": model,
-        "prompt": prompt,
-        "stream": False,
-    }
-
-    resp = requests.post(url, json=payload, timeout=600)
-    resp.raise_for_status()
-    data = resp.json()
-    return data.get("response", "").strip()
+from llm_cache import ResponseCache, SemanticCache, add_cache_arguments, cache_namespace
+from llm_client import (
+    add_backend_arguments,
+    cached_response,
+    call_llm,
+    open_session,
+    resolve_base_url,
+    set_response_cache,
+)
+from text_utils import looks_like_japanese
 
 
 # =========================
@@ -38,47 +33,103 @@ def load_text(path: pathlib.Path) -> str:
 def chunk_text(text: str, max_chars: int = 3500) -> list[str]:
     """
     Roughly chunk text by character length so it fits in the model context.
-    Tries to split on line boundaries.
+    Tries to split on line boundaries. A short leftover at the end (often
+    the lecture's closing remarks) is merged into the previous chunk
+    instead of becoming a chunk of its own.
     """
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [line.strip() for line in text.splitlines()]
+    if not lines:
+        return []
+
+    # Each line costs its length plus one newline; with the running total
+    # precomputed, every chunk boundary is a single binary search instead
+    # of per-line Python arithmetic.
+    line_costs = np.fromiter(
+        (len(line) + 1 for line in lines), dtype=np.int64, count=len(lines)
+    )
+    cum = np.cumsum(line_costs)
 
     chunks = []
-    current = []
-    current_len = 0
-
-    for line in text.split("\n"):
-        line = line.strip()
-        if not line:
-            line = ""
-
-        if current_len + len(line) + 1 > max_chars and current:
-            chunks.append("\n".join(current).strip())
-            current = [line]
-            current_len = len(line) + 1
-        else:
-            current.append(line)
-            current_len += len(line) + 1
+    start = 0
+    while start < len(lines):
+        base = cum[start - 1] if start else 0
+        end = int(np.searchsorted(cum, base + max_chars, side="right"))
+        # A single line longer than max_chars still becomes its own chunk
+        end = max(end, start + 1)
+        # strip() only trims blank lines at the chunk edges
+        chunks.append("\n".join(lines[start:end]).strip())
+        start = end
+
+    chunks = [c for c in chunks if c]
+    if len(chunks) >= 2 and len(chunks[-1]) < max_chars // 4:
+        chunks[-2] += "\n" + chunks.pop()
+    return chunks
+
+
+# =========================
+# Checkpoints
+# =========================
+
+def checkpoint_path(checkpoint_dir: pathlib.Path,
+                    part_idx: int,
+                    chunk: str,
+                    namespace: str) -> pathlib.Path:
+    """
+    Where the summary of chunk `part_idx` is saved. The name includes a
+    hash of the chunk and of `namespace` (model + prompt templates, see
+    cache_namespace), so an edited chunk, another --model or an edited
+    prompt never picks up an old summary.
+    """
+    digest = hashlib.sha256(
+        (namespace + "\0" + chunk).encode("utf-8")
+    ).hexdigest()[:12]
+    return checkpoint_dir / f"part_{part_idx:03d}_{digest}.txt"
 
-    if current:
-        chunks.append("\n".join(current).strip())
 
-    return [c for c in chunks if c]
+def save_checkpoint(checkpoint_dir: pathlib.Path,
+                    part_idx: int,
+                    chunk: str,
+                    namespace: str,
+                    summary: str) -> None:
+    """
+    Save one chunk summary, replacing any older summary of the same part.
+    Written to a temp file first so a crash never leaves a half-written one.
+    """
+    checkpoint_dir.mkdir(exist_ok=True)
+    path = checkpoint_path(checkpoint_dir, part_idx, chunk, namespace)
+    for old in checkpoint_dir.glob(f"part_{part_idx:03d}_*.txt"):
+        if old != path:
+            old.unlink()
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(summary, encoding="utf-8")
+    tmp.replace(path)
 
 
 # =========================
 # Summarization pipeline
 # =========================
 
-def summarize_chunk(chunk_text: str,
-                    part_idx: int,
-                    total_parts: int,
-                    model: str,
-                    host: str) -> str:
+# Short chunks with no Japanese in them (stray timestamps, "[Music]",
+# ...) are not worth a model call
+MIN_SUMMARY_CHARS = 40
+SHORT_CHUNK_PLACEHOLDER = "(内容が短いため省略)"
+
+
+def is_negligible_chunk(chunk: str) -> bool:
     """
-    Ask the model for a short bullet summary of one chunk.
+    True for chunks with nothing to summarize: blank, or short with no
+    Japanese text. Short Japanese chunks are real content and are kept.
     """
-    prompt = f"""あなたは日本の大学講義ノートを作るアシスタントです。
-以下は講義文字起こしの一部です。（Part {part_idx}/{total_parts}）
+    stripped = chunk.strip()
+    return not stripped or (
+        len(stripped) < MIN_SUMMARY_CHARS and not looks_like_japanese(stripped)
+    )
+
+# Static instructions come first and contain no variables, so every
+# chunk shares the same token prefix and the server's prompt/KV cache
+# can skip re-processing it. Only the tail differs between calls.
+SUMMARY_INSTRUCTIONS = """あなたは日本の大学講義ノートを作るアシスタントです。
+以下は講義文字起こしの一部です。
 
 この部分だけについて、後で全体をまとめるための「メモ用の箇条書き」を作ってください。
 
@@ -88,7 +139,9 @@ def summarize_chunk(chunk_text: str,
 - 重要な用語・人名・地名・時代名はできるだけそのまま残す
 - 簡潔に要点だけまとめる
 - 文章の順番は、流れが分かりやすいように並べる
+"""
 
+_SUMMARY_TMPL = SUMMARY_INSTRUCTIONS + """
 === Transcript Part {part_idx}/{total_parts} ===
 {chunk_text}
 ==========================================
@@ -97,22 +150,242 @@ def summarize_chunk(chunk_text: str,
 「Part ○○」などの余計なヘッダーや説明文は書かないでください。
 """
 
-    return call_ollama(prompt, model=model, host=host)
+
+async def summarize_chunk(session: aiohttp.ClientSession,
+                          chunk_text: str,
+                          part_idx: int,
+                          total_parts: int,
+                          model: str,
+                          host: str,
+                          cache: SemanticCache | None = None,
+                          semantic_checked: bool = False) -> str:
+    """
+    Ask the model for a short bullet summary of one chunk.
+    If a semantic cache is given, a near-identical earlier chunk's
+    summary is reused instead of calling the model; pass
+    `semantic_checked=True` if the caller already looked the chunk up.
+    Chunks with nothing to summarize get a placeholder without any
+    model call.
+    """
+    if is_negligible_chunk(chunk_text):
+        print(f"   ↳ (Part {part_idx}: nothing to summarize, skipping)")
+        return SHORT_CHUNK_PLACEHOLDER
+
+    prompt = _SUMMARY_TMPL.format(
+        chunk_text=chunk_text,
+        part_idx=part_idx,
+        total_parts=total_parts,
+    )
+
+    # The exact-match cache is a single hash lookup; only embed on a miss.
+    # Embedding runs in a worker thread so other requests keep streaming.
+    semantic = cache is not None and cached_response(model, prompt) is None
+    if semantic and not semantic_checked:
+        cached = await asyncio.to_thread(cache.get, chunk_text)
+        if cached is not None:
+            print(f"   ↳ (Part {part_idx}: semantic cache hit)")
+            return cached
+
+    summary = await call_llm(session, prompt, model=model, host=host)
+    if semantic:
+        await asyncio.to_thread(cache.put, chunk_text, summary)
+    return summary
+
+
+PARTIAL_NOTES_INSTRUCTIONS = """あなたは日本の大学講義ノートを作るアシスタントです。
+===INPUT=== の後に、講義の連続したいくつかのパートの要約メモ（箇条書き）が与えられます。
+
+これらを、後で講義全体のノートを作るための１つのメモにまとめてください。
+
+条件:
+- 日本語で書く
+- 箇条書き 5〜10 個
+- 重要な用語・人名・地名・時代名はそのまま残す
+- 重複している内容は１つにまとめる
+- 講義の流れが分かるように、元の順番を保つ
+
+出力は、日本語の箇条書きだけにしてください。
+「Part ○○」などの余計なヘッダーや説明文は書かないでください。
+"""
+
+_PARTIAL_NOTES_TMPL = PARTIAL_NOTES_INSTRUCTIONS + """
+===INPUT===
+{merged_summaries}
+"""
+
+
+BATCH_SUMMARY_INSTRUCTIONS = """あなたは日本の大学講義ノートを作るアシスタントです。
+===INPUT=== の後に、講義文字起こしの連続したいくつかのパートが
+「=== Part A ===」「=== Part B ===」…の区切りで与えられます。
+
+各パートについて別々に、後で全体をまとめるための「メモ用の箇条書き」を作ってください。
+
+条件:
+- 日本語で書く
+- 各パートにつき箇条書き 3〜6 個
+- 重要な用語・人名・地名・時代名はできるだけそのまま残す
+- 簡潔に要点だけまとめる
+- 文章の順番は、流れが分かりやすいように並べる
+
+出力形式（必ず守ること）:
+--- PART A ---
+（Part A の箇条書き）
+--- PART B ---
+（Part B の箇条書き）
+…
+
+区切り行以外の余計なヘッダーや説明文は書かないでください。
+"""
+
+_BATCH_SUMMARY_TMPL = BATCH_SUMMARY_INSTRUCTIONS + """
+===INPUT===
+{parts}
+==========================================
+（Part {numbers}）
+"""
+
+_PART_DELIMITER_RE = re.compile(
+    r"^\s*-{3}\s*PART\s+([A-Z])\s*-{3}\s*$", re.MULTILINE | re.IGNORECASE
+)
 
 
-def build_final_notes_from_summaries(summaries: list[str],
-                                     model: str,
-                                     host: str) -> str:
+def parse_batch_summaries(response: str, labels: list[str]) -> list[str] | None:
     """
-    Given a list of chunk-level summaries, ask the model to create
-    the full structured lecture notes (JP only).
+    Split a batched summary response on its "--- PART X ---" lines.
+    Returns the summaries in `labels` order, or None if the model did not
+    produce exactly one block per label.
+    """
+    pieces = _PART_DELIMITER_RE.split(response)
+    # pieces = [preamble, label, body, label, body, ...]
+    found = {}
+    for label, body in zip(pieces[1::2], pieces[2::2]):
+        label = label.upper()
+        if label in found:
+            return None
+        found[label] = body.strip()
+
+    if sorted(found) != sorted(labels) or not all(found.values()):
+        return None
+    return [found[label] for label in labels]
+
+
+async def summarize_chunk_batch(session: aiohttp.ClientSession,
+                                chunks: list[str],
+                                first_idx: int,
+                                total_parts: int,
+                                model: str,
+                                host: str,
+                                cache: SemanticCache | None = None,
+                                semaphore: asyncio.Semaphore | None = None) -> list[str]:
+    """
+    Summarize several consecutive chunks with a single request, saving the
+    per-request overhead when chunks are small. Falls back to one request
+    per chunk if the response cannot be split back into parts.
+    Every request (batched or fallback) takes its own `semaphore` slot.
+    """
+    slot = semaphore if semaphore is not None else contextlib.nullcontext()
+    summaries: list[str | None] = [None] * len(chunks)
+    for j, chunk in enumerate(chunks):
+        if is_negligible_chunk(chunk):
+            summaries[j] = SHORT_CHUNK_PLACEHOLDER
+
+    def batch_prompt(indices: list[int]) -> tuple[str, list[str]]:
+        labels = list(string.ascii_uppercase[:len(indices)])
+        parts = "\n".join(
+            f"=== Part {label} ===\n{chunks[j]}"
+            for label, j in zip(labels, indices)
+        )
+        numbers = ", ".join(
+            f"{label} = {first_idx + j}/{total_parts}"
+            for label, j in zip(labels, indices)
+        )
+        return _BATCH_SUMMARY_TMPL.format(parts=parts, numbers=numbers), labels
+
+    # Fast path: an unchanged re-run finds the whole batch in the
+    # exact-match cache without embedding anything.
+    missing = [j for j, summary in enumerate(summaries) if summary is None]
+    if len(missing) > 1:
+        prompt, labels = batch_prompt(missing)
+        cached = cached_response(model, prompt)
+        parsed = parse_batch_summaries(cached, labels) if cached else None
+        if parsed is not None:
+            for j, summary in zip(missing, parsed):
+                summaries[j] = summary
+            return summaries
+
+    if cache is not None:
+        for j in missing:
+            single_prompt = _SUMMARY_TMPL.format(
+                chunk_text=chunks[j],
+                part_idx=first_idx + j,
+                total_parts=total_parts,
+            )
+            summaries[j] = cached_response(model, single_prompt)
+            if summaries[j] is None:
+                summaries[j] = await asyncio.to_thread(cache.get, chunks[j])
+
+    missing = [j for j, summary in enumerate(summaries) if summary is None]
+
+    async def summarize_one(j: int) -> str:
+        async with slot:
+            return await summarize_chunk(
+                session,
+                chunks[j],
+                part_idx=first_idx + j,
+                total_parts=total_parts,
+                model=model,
+                host=host,
+                cache=cache,
+                # Already looked up above; do not embed the chunk again
+                semantic_checked=True,
+            )
+
+    async def one_by_one() -> None:
+        results = await asyncio.gather(*(summarize_one(j) for j in missing))
+        for j, summary in zip(missing, results):
+            summaries[j] = summary
+
+    if len(missing) == 1:
+        await one_by_one()
+        return summaries
+
+    if missing:
+        prompt, labels = batch_prompt(missing)
+        async with slot:
+            response = await call_llm(session, prompt, model=model, host=host)
+        parsed = parse_batch_summaries(response, labels)
+
+        if parsed is None:
+            print(f"   ↳ (could not split batched summary for parts {first_idx}–{first_idx + len(chunks) - 1}, retrying one by one)")
+            await one_by_one()
+        else:
+            for j, summary in zip(missing, parsed):
+                summaries[j] = summary
+                if cache is not None:
+                    await asyncio.to_thread(cache.put, chunks[j], summary)
+
+    return summaries
+
+
+async def build_partial_notes(session: aiohttp.ClientSession,
+                              summaries: list[str],
+                              model: str,
+                              host: str) -> str:
+    """
+    Merge a group of consecutive summaries into one shorter bullet memo.
+    Used to reduce many chunk summaries before the final notes prompt.
     """
     merged_summaries = "\n\n".join(
         f"[Part {i+1}]\n{summaries[i]}"
         for i in range(len(summaries))
     )
 
-    prompt = f"""あなたは、日本の大学で勉強している留学生のための
+    prompt = _PARTIAL_NOTES_TMPL.format(merged_summaries=merged_summaries)
+
+    return await call_llm(session, prompt, model=model, host=host)
+
+
+_FINAL_NOTES_TMPL = """あなたは、日本の大学で勉強している留学生のための
 「分かりやすい講義ノート作成アシスタント」です。
 
 以下に、講義全体の要約メモ（各パートごとの箇条書き）が与えられます。
@@ -183,7 +456,198 @@ def build_final_notes_from_summaries(summaries: list[str],
 それでは、指示したフォーマットに従って講義ノートを作成してください。
 """
 
-    return call_ollama(prompt, model=model, host=host)
+
+async def build_final_notes_from_summaries(session: aiohttp.ClientSession,
+                                           summaries: list[str],
+                                           model: str,
+                                           host: str,
+                                           on_token: Callable[[str], None] | None = None) -> str:
+    """
+    Given a list of chunk-level summaries, ask the model to create
+    the full structured lecture notes (JP only).
+    `on_token` receives the notes piece by piece while they are generated.
+    """
+    merged_summaries = "\n\n".join(
+        f"[Part {i+1}]\n{summaries[i]}"
+        for i in range(len(summaries))
+    )
+
+    prompt = _FINAL_NOTES_TMPL.format(merged_summaries=merged_summaries)
+
+    return await call_llm(session, prompt, model=model, host=host, on_token=on_token)
+
+
+async def summarize_all_chunks(session: aiohttp.ClientSession,
+                               chunks: list[str],
+                               model: str,
+                               host: str,
+                               concurrency: int,
+                               cache: SemanticCache | None = None,
+                               micro_batch: int = 1,
+                               checkpoint_dir: pathlib.Path | None = None,
+                               resume: bool = True) -> list[str]:
+    """
+    Summarize every chunk concurrently, with at most `concurrency`
+    requests in flight. With `micro_batch` > 1, that many consecutive
+    chunks share one request. Summaries are returned in chunk order.
+
+    With `checkpoint_dir`, each summary is saved there as soon as it is
+    done, and (if `resume`) chunks that already have a saved summary from
+    an earlier run are not summarized again.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Checkpoints are only valid for the model and prompts that made them
+    templates = _SUMMARY_TMPL
+    if micro_batch > 1:
+        templates += _BATCH_SUMMARY_TMPL
+    namespace = cache_namespace(model, templates)
+
+    def load_checkpoints(i: int, group: list[str]) -> list[str] | None:
+        if checkpoint_dir is None or not resume:
+            return None
+        paths = [
+            checkpoint_path(checkpoint_dir, i + j, chunk, namespace)
+            for j, chunk in enumerate(group)
+        ]
+        if not all(path.exists() for path in paths):
+            return None
+        return [path.read_text(encoding="utf-8") for path in paths]
+
+    async def worker(i: int, group: list[str]) -> list[str]:
+        last = i + len(group) - 1
+        label = f"{i}/{len(chunks)}" if last == i else f"{i}–{last}/{len(chunks)}"
+
+        saved = load_checkpoints(i, group)
+        if saved is not None:
+            print(f"💾 Chunk {label}: using saved summary")
+            return saved
+
+        if len(group) == 1:
+            async with semaphore:
+                print(f"📝 Summarizing chunk {label} ...")
+                group_summaries = [await summarize_chunk(
+                    session,
+                    group[0],
+                    part_idx=i,
+                    total_parts=len(chunks),
+                    model=model,
+                    host=host,
+                    cache=cache,
+                )]
+        else:
+            print(f"📝 Summarizing chunk {label} ...")
+            # Takes a semaphore slot per request it sends, so a batch that
+            # falls back to one-by-one still respects --concurrency
+            group_summaries = await summarize_chunk_batch(
+                session,
+                group,
+                first_idx=i,
+                total_parts=len(chunks),
+                model=model,
+                host=host,
+                cache=cache,
+                semaphore=semaphore,
+            )
+        if checkpoint_dir is not None:
+            for j, (chunk, summary) in enumerate(zip(group, group_summaries)):
+                # An empty summary is a failed call; retry it next run
+                if not summary:
+                    continue
+                save_checkpoint(checkpoint_dir, i + j, chunk, namespace, summary)
+        print(f"   ✔ chunk {label} done")
+        return group_summaries
+
+    groups = await asyncio.gather(*(
+        worker(i + 1, chunks[i:i + micro_batch])
+        for i in range(0, len(chunks), micro_batch)
+    ))
+    return [summary for group in groups for summary in group]
+
+
+async def reduce_summaries(session: aiohttp.ClientSession,
+                           summaries: list[str],
+                           model: str,
+                           host: str,
+                           concurrency: int,
+                           fanout: int = 8) -> list[str]:
+    """
+    Map-reduce the chunk summaries: merge groups of `fanout` consecutive
+    summaries into one memo each, level by level, until at most `fanout`
+    remain. Groups on the same level are merged concurrently.
+    Keeps the final notes prompt bounded no matter how long the lecture is.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(group: list[str]) -> str:
+        # A trailing group of one has nothing to merge with
+        if len(group) == 1:
+            return group[0]
+        async with semaphore:
+            return await build_partial_notes(
+                session, group, model=model, host=host
+            )
+
+    level = 1
+    while len(summaries) > fanout:
+        groups = [
+            summaries[i:i + fanout]
+            for i in range(0, len(summaries), fanout)
+        ]
+        print(f"🧩 Merging {len(summaries)} summaries into {len(groups)} (level {level}) ...")
+        summaries = await asyncio.gather(*(worker(group) for group in groups))
+        level += 1
+
+    return summaries
+
+
+async def generate_notes(chunks: list[str],
+                         model: str,
+                         host: str,
+                         concurrency: int,
+                         cache: SemanticCache | None = None,
+                         fanout: int = 8,
+                         micro_batch: int = 1,
+                         checkpoint_dir: pathlib.Path | None = None,
+                         resume: bool = True) -> str:
+    """
+    Run the whole pipeline: per-chunk summaries, merged down to at most
+    `fanout` memos, then the final notes.
+    """
+    async with open_session(concurrency) as session:
+        # 1) Summarize each chunk
+        summaries = await summarize_all_chunks(
+            session,
+            chunks,
+            model=model,
+            host=host,
+            concurrency=concurrency,
+            cache=cache,
+            micro_batch=micro_batch,
+            checkpoint_dir=checkpoint_dir,
+            resume=resume,
+        )
+        summaries = await reduce_summaries(
+            session,
+            summaries,
+            model=model,
+            host=host,
+            concurrency=concurrency,
+            fanout=fanout,
+        )
+
+        # 2) Build final notes
+        # Stream the notes to the terminal as they are written
+        print("📚 Building final structured notes from chunk summaries...")
+        final_notes = await build_final_notes_from_summaries(
+            session,
+            summaries,
+            model=model,
+            host=host,
+            on_token=lambda token: print(token, end="", flush=True),
+        )
+        print()
+        return final_notes
 
 
 # =========================
@@ -192,31 +656,39 @@ def build_final_notes_from_summaries(summaries: list[str],
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Generate structured JP-only lecture notes from a Japanese transcript using a local Ollama model."
+        description="Generate structured JP-only lecture notes from a Japanese transcript using a local LLM server (Ollama or vLLM)."
     )
     parser.add_argument(
         "transcript_file",
         type=str,
         help="Path to the transcript .txt file (e.g., Week 7_transcript_ja.txt)",
     )
+    add_backend_arguments(parser)
     parser.add_argument(
-        "--model",
-        type=str,
-        default="llama3.1",
-        help="Ollama model name (default: llama3.1)",
+        "--chunk-chars",
+        type=int,
+        default=3500,
+        help="Approximate max characters per chunk before summarizing (default: 3500)",
     )
     parser.add_argument(
-        "--host",
-        type=str,
-        default="http://localhost:11434",
-        help="Ollama host URL (default: http://localhost:11434)",
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Max number of chunk summaries requested in parallel (default: 4)",
     )
     parser.add_argument(
-        "--chunk-chars",
+        "--micro-batch",
         type=int,
-        default=3500,
-        help="Approximate max characters per chunk before summarizing (default: 3500)",
+        default=1,
+        help="Summarize this many consecutive chunks per request; useful with small --chunk-chars (default: 1, max: 26)",
     )
+    parser.add_argument(
+        "--reduce-fanout",
+        type=int,
+        default=8,
+        help="Merge chunk summaries in groups of this size until at most this many remain (default: 8)",
+    )
+    add_cache_arguments(parser)
 
     args = parser.parse_args()
 
@@ -232,26 +704,32 @@ def main():
     chunks = chunk_text(text, max_chars=args.chunk_chars)
     print(f"  → {len(chunks)} chunk(s)")
 
-    # 1) Summarize each chunk
-    summaries = []
-    for i, chunk in enumerate(chunks, start=1):
-        print(f"📝 Summarizing chunk {i}/{len(chunks)} ...")
-        summary = summarize_chunk(
-            chunk,
-            part_idx=i,
-            total_parts=len(chunks),
-            model=args.model,
-            host=args.host,
+    if not args.no_cache:
+        set_response_cache(ResponseCache())
+
+    cache = None
+    if args.semantic_cache:
+        cache = SemanticCache(
+            transcript_path.parent / "nanishiteru_cache.sqlite",
+            namespace=cache_namespace(args.model, _SUMMARY_TMPL),
         )
-        summaries.append(summary)
-
-    # 2) Build final notes
-    print("📚 Building final structured notes from chunk summaries...")
-    final_notes = build_final_notes_from_summaries(
-        summaries,
-        model=args.model,
-        host=args.host,
-    )
+
+    # 1) + 2) Summarize chunks in parallel, then build final notes
+    try:
+        final_notes = asyncio.run(generate_notes(
+            chunks,
+            model=args.model,
+            host=resolve_base_url(args),
+            concurrency=max(1, args.concurrency),
+            cache=cache,
+            fanout=max(2, args.reduce_fanout),
+            micro_batch=min(max(1, args.micro_batch), len(string.ascii_uppercase)),
+            checkpoint_dir=transcript_path.with_name(transcript_path.stem + ".summaries"),
+            resume=not args.no_cache,
+        ))
+    finally:
+        if cache is not None:
+            cache.close()
 
     # 3) Save output
     out_path = transcript_path.with_name(
@@ -0,0 +1,266 @@
+import argparse
+import hashlib
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# =========================
+# CLI flags
+# =========================
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the shared response-cache flags to a CLI parser.
+    """
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not reuse responses from earlier runs for identical prompts",
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help="Reuse responses for near-identical chunks from earlier runs "
+             "(needs sentence-transformers)",
+    )
+
+
+def cache_namespace(model: str, template: str) -> str:
+    """
+    Build a cache namespace from the model name and the prompt template,
+    so switching models or editing a prompt never returns stale responses.
+    """
+    template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+    return f"{model}\0{template_hash}"
+
+
+# =========================
+# Exact-match cache
+# =========================
+
+DEFAULT_RESPONSE_CACHE_PATH = (
+    pathlib.Path.home() / ".cache" / "nanishiteru" / "responses.sqlite"
+)
+
+
+class ResponseCache:
+    """
+    Persistent exact-match cache: (model, prompt) -> response.
+    Re-running the pipeline on an unchanged transcript then costs one
+    SHA-256 and one SQLite lookup per chunk instead of a model call.
+    """
+
+    def __init__(self, path: pathlib.Path = DEFAULT_RESPONSE_CACHE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   key TEXT PRIMARY KEY,
+                   response TEXT NOT NULL
+               )"""
+        )
+        self._db.commit()
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256((model + "\0" + prompt).encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt: str) -> str | None:
+        row = self._db.execute(
+            "SELECT response FROM responses WHERE key = ?",
+            (self.key(model, prompt),),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, model: str, prompt: str, response: str) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)",
+            (self.key(model, prompt), response),
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+# =========================
+# Semantic cache
+# =========================
+
+class SemanticCache:
+    """
+    SQLite-backed cache that returns a stored response when a new input is
+    a near-duplicate of an earlier one. Useful when re-running on a
+    re-transcribed lecture whose chunks only differ by a few Whisper
+    mistakes.
+
+    Inputs are compared window by window (see _embed): a hit needs about
+    the same length and cosine similarity >= `threshold` for *every*
+    aligned window, so two different chunks on the same topic do not
+    match just because their average meaning is close.
+
+    Entries are evicted least-recently-used once there are more than
+    `max_entries` of them.
+
+    get() and put() may be called from worker threads (asyncio.to_thread)
+    so embedding does not block the event loop; calls are serialized.
+    """
+
+    # all-MiniLM-L6-v2 is English-only; the multilingual variant of the same
+    # family handles Japanese transcripts properly. It only reads the first
+    # 128 tokens of its input, so longer chunks are embedded window by
+    # window (see _embed).
+    DEFAULT_EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+    def __init__(self,
+                 path: pathlib.Path,
+                 namespace: str,
+                 threshold: float = 0.87,
+                 max_length_diff: float = 0.1,
+                 max_entries: int = 5000,
+                 embedding_model: str = DEFAULT_EMBEDDING_MODEL):
+        # numpy and sentence-transformers are only needed for this cache,
+        # so the plain ResponseCache users do not have to install them.
+        try:
+            import numpy  # noqa: F401
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "--semantic-cache needs numpy and sentence-transformers "
+                "(pip install numpy sentence-transformers)"
+            ) from e
+
+        # Embeddings from different encoders are not comparable (and may
+        # not even have the same size), so the encoder is part of the key.
+        self.namespace = f"{namespace}\0{embedding_model}"
+        self.threshold = threshold
+        self.max_length_diff = max_length_diff
+        self.max_entries = max_entries
+        self._encoder = SentenceTransformer(embedding_model)
+        self._dim = self._encoder.get_sentence_embedding_dimension()
+        self._pending: dict[str, "np.ndarray"] = {}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # The old single-vector table cannot be matched window by window
+        self._db.execute("DROP TABLE IF EXISTS entries")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS window_entries (
+                   id INTEGER PRIMARY KEY,
+                   namespace TEXT NOT NULL,
+                   length INTEGER NOT NULL,
+                   embeddings BLOB NOT NULL,
+                   response TEXT NOT NULL,
+                   last_used REAL NOT NULL
+               )"""
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS window_entries_namespace "
+            "ON window_entries (namespace)"
+        )
+        self._db.commit()
+        self._load()
+
+    def _load(self) -> None:
+        import numpy as np
+
+        rows = self._db.execute(
+            "SELECT id, length, embeddings FROM window_entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchall()
+        # (id, text length, one embedding row per window)
+        self._entries = [
+            (entry_id, length, np.frombuffer(blob, dtype=np.float32).reshape(-1, self._dim))
+            for entry_id, length, blob in rows
+        ]
+
+    def _embed(self, text: str) -> "np.ndarray":
+        """
+        Embed the whole text: split it into windows the encoder can read
+        in full (one window character is at most about one token) and
+        return one normalized embedding per window. Otherwise only the
+        first ~100 characters would count.
+        """
+        import numpy as np
+
+        window = self._encoder.max_seq_length
+        windows = [text[i:i + window] for i in range(0, len(text), window)] or [""]
+        return self._encoder.encode(
+            windows, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+    def get(self, text: str) -> str | None:
+        """
+        Return the cached response for the closest earlier input whose
+        aligned windows are all similar enough, or None.
+        """
+        import numpy as np
+
+        with self._lock:
+            embeddings = self._embed(text)
+            # Keep the embeddings around so put() need not recompute them.
+            self._pending[text] = embeddings
+
+            best_id, best_sim = None, self.threshold
+            for entry_id, length, stored in self._entries:
+                if abs(length - len(text)) > self.max_length_diff * max(length, len(text)):
+                    continue
+                n = min(len(stored), len(embeddings))
+                # The weakest aligned window decides: one differing passage is
+                # enough to make it a different chunk.
+                sim = float(np.einsum("ij,ij->i", stored[:n], embeddings[:n]).min())
+                if sim >= best_sim:
+                    best_id, best_sim = entry_id, sim
+
+            if best_id is None:
+                return None
+
+            self._db.execute(
+                "UPDATE window_entries SET last_used = ? WHERE id = ?",
+                (time.time(), best_id),
+            )
+            self._db.commit()
+            row = self._db.execute(
+                "SELECT response FROM window_entries WHERE id = ?", (best_id,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def put(self, text: str, response: str) -> None:
+        """
+        Store the response for `text` and evict old entries if needed.
+        Empty responses are not stored.
+        """
+        with self._lock:
+            embeddings = self._pending.pop(text, None)
+            if not response:
+                return
+            if embeddings is None:
+                embeddings = self._embed(text)
+
+            cur = self._db.execute(
+                "INSERT INTO window_entries "
+                "(namespace, length, embeddings, response, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, len(text), embeddings.tobytes(), response, time.time()),
+            )
+            self._entries.append((cur.lastrowid, len(text), embeddings))
+
+            (count,) = self._db.execute("SELECT COUNT(*) FROM window_entries").fetchone()
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM window_entries WHERE id IN ("
+                    "  SELECT id FROM window_entries ORDER BY last_used LIMIT ?"
+                    ")",
+                    (count - self.max_entries,),
+                )
+                self._load()
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,175 @@
+import argparse
+import json
+from collections.abc import AsyncIterator, Callable
+
+import aiohttp
+
+from llm_cache import ResponseCache
+
+
+# =========================
+# Backends
+# =========================
+
+# Both Ollama and vLLM expose an OpenAI-compatible chat completions API,
+# so the only thing that differs between them is where the server lives.
+DEFAULT_BASE_URLS = {
+    "ollama": "http://localhost:11434",
+    "vllm": "http://localhost:8000",
+}
+
+# No cap on the whole request: it may wait in the server's queue behind
+# other chunks, and a long streamed answer keeps going as long as tokens
+# arrive. Only give up when the server goes silent for 600 s.
+LLM_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=600)
+
+
+def add_backend_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the shared --backend / --base-url / --model flags to a CLI parser.
+    """
+    parser.add_argument(
+        "--backend",
+        choices=sorted(DEFAULT_BASE_URLS),
+        default="ollama",
+        help="LLM server to talk to (default: ollama)",
+    )
+    parser.add_argument(
+        "--base-url",
+        "--host",
+        dest="base_url",
+        type=str,
+        default=None,
+        help="Server base URL (default: http://localhost:11434 for ollama, "
+             "http://localhost:8000 for vllm)",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="llama3.1",
+        help="Model name as known by the backend (default: llama3.1)",
+    )
+
+
+def resolve_base_url(args: argparse.Namespace) -> str:
+    """
+    Return the base URL given on the command line, or the backend's default.
+    """
+    return (args.base_url or DEFAULT_BASE_URLS[args.backend]).rstrip("/")
+
+
+# =========================
+# Client
+# =========================
+
+def open_session(concurrency: int) -> aiohttp.ClientSession:
+    """
+    Create the HTTP session shared by all requests of one run.
+    Connections are kept alive and pooled, sized to the number of
+    requests that can be in flight at once, so each chunk reuses an
+    existing connection instead of opening a new one.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=concurrency,
+        keepalive_timeout=60,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+# Exact-match cache consulted by every call_llm(); set up by the CLI.
+_response_cache: ResponseCache | None = None
+
+
+def set_response_cache(cache: ResponseCache | None) -> None:
+    global _response_cache
+    _response_cache = cache
+
+
+def cached_response(model: str, prompt: str) -> str | None:
+    """
+    Look `prompt` up in the exact-match response cache without calling
+    the model. Callers with a more expensive cache of their own (the
+    semantic cache) check this first.
+    """
+    if _response_cache is None:
+        return None
+    return _response_cache.get(model, prompt)
+
+
+async def stream_llm(session: aiohttp.ClientSession,
+                     prompt: str,
+                     model: str = "llama3.1",
+                     host: str = "http://localhost:11434") -> AsyncIterator[str]:
+    """
+    Send a single-turn chat completion request with streaming enabled and
+    yield the response text piece by piece as the server generates it.
+    """
+    url = f"{host}/v1/chat/completions"
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": True,
+    }
+
+    async with session.post(url, json=payload, timeout=LLM_TIMEOUT) as resp:
+        resp.raise_for_status()
+        # Server-sent events: one "data: {...}" line per generated piece,
+        # terminated by "data: [DONE]"
+        done = False
+        async for raw_line in resp.content:
+            line = raw_line.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                done = True
+                break
+            event = json.loads(data)
+            # vLLM and Ollama report mid-stream failures as an event too
+            if "error" in event or event.get("object") == "error":
+                error = event.get("error", event)
+                if isinstance(error, dict):
+                    error = error.get("message", error)
+                raise RuntimeError(f"LLM server error: {error}")
+            choices = event.get("choices") or []
+            if not choices:
+                continue
+            token = choices[0].get("delta", {}).get("content")
+            if token:
+                yield token
+
+    if not done:
+        raise RuntimeError("LLM response stream ended before [DONE]")
+
+
+async def call_llm(session: aiohttp.ClientSession,
+                   prompt: str,
+                   model: str = "llama3.1",
+                   host: str = "http://localhost:11434",
+                   on_token: Callable[[str], None] | None = None) -> str:
+    """
+    Send a single-turn chat completion request and return the response text.
+    Works with any OpenAI-compatible server (Ollama, vLLM, ...).
+    Identical (model, prompt) pairs are answered from the response cache.
+
+    The response is streamed; pass `on_token` to see each piece as soon as
+    it arrives (e.g. to print the notes while they are being written).
+    """
+    cached = cached_response(model, prompt)
+    if cached is not None:
+        if on_token is not None:
+            on_token(cached)
+        return cached
+
+    pieces = []
+    async for token in stream_llm(session, prompt, model=model, host=host):
+        pieces.append(token)
+        if on_token is not None:
+            on_token(token)
+    text = "".join(pieces).strip()
+
+    # Never persist an empty answer: it would be replayed on every later run
+    if text and _response_cache is not None:
+        _response_cache.put(model, prompt, text)
+    return text
@@ -0,0 +1,36 @@
+import re
+
+
+# Hiragana / katakana / kanji
+_JP_RE = re.compile(r"[ぁ-んァ-ン一-龯]")
+# Characters looked at between early-exit checks in looks_like_japanese()
+_JP_SCAN_BLOCK = 256
+
+
+def looks_like_japanese(text: str, threshold: float = 0.3) -> bool:
+    """
+    Very rough heuristic:
+    Return True if at least `threshold` fraction of characters
+    are Japanese (hiragana/katakana/kanji).
+    """
+    if not text:
+        return False
+
+    # Scan in blocks and stop as soon as the answer can no longer change:
+    # either enough Japanese has been seen already, or even an all-Japanese
+    # remainder could not reach the threshold.
+    total = len(text)
+    needed = threshold * total
+    jp_count = 0
+    for start in range(0, total, _JP_SCAN_BLOCK):
+        block = text[start:start + _JP_SCAN_BLOCK]
+        # subn() counts matches inside the regex engine, without building a
+        # list with one string object per Japanese character like findall().
+        jp_count += _JP_RE.subn("", block)[1]
+        if jp_count >= needed:
+            return True
+        remaining = total - (start + len(block))
+        if jp_count + remaining < needed:
+            return False
+
+    return jp_count >= needed
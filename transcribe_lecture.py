@@ -2,10 +2,13 @@ import argparse
 import subprocess
 import pathlib
 import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 
-import whisper
+import numpy as np
 import torch
-import re
+
+from text_utils import looks_like_japanese
 
 
 def split_audio(input_path: pathlib.Path, chunk_seconds: int = 600) -> list[pathlib.Path]:
@@ -16,26 +19,36 @@ def split_audio(input_path: pathlib.Path, chunk_seconds: int = 600) -> list[path
     chunk_dir = input_path.parent / f"{input_path.stem}_chunks"
     chunk_dir.mkdir(exist_ok=True)
 
-    # use .m4a so we can copy the original AAC audio without re-encoding
-    output_pattern = chunk_dir / "chunk_%03d.m4a"
+    # Decode once to 16 kHz mono PCM WAV, which is exactly what Whisper
+    # feeds its model. Unlike stream-copying AAC (which can only cut on
+    # packet/keyframe boundaries), every chunk then starts exactly at
+    # N * chunk_seconds, and Whisper no longer has to resample each chunk.
+    output_pattern = chunk_dir / "chunk_%03d.wav"
 
     cmd = [
         "ffmpeg",
         "-i",
         str(input_path),
+        "-vn",  # ignore video / cover art streams
+        "-ar",
+        "16000",
+        "-ac",
+        "1",
+        "-c:a",
+        "pcm_s16le",
         "-f",
         "segment",
         "-segment_time",
         str(chunk_seconds),
-        "-c",
-        "copy",  # copy AAC into m4a segments
+        "-reset_timestamps",
+        "1",
         str(output_pattern),
     ]
 
     print("▶️ Splitting audio with ffmpeg...")
     subprocess.run(cmd, check=True)
 
-    chunks = sorted(chunk_dir.glob("chunk_*.m4a"))
+    chunks = sorted(chunk_dir.glob("chunk_*.wav"))
     if not chunks:
         print("No chunks were created. Check your input file.")
         sys.exit(1)
@@ -44,60 +57,127 @@ def split_audio(input_path: pathlib.Path, chunk_seconds: int = 600) -> list[path
     return chunks
 
 
-def looks_like_japanese(text: str, threshold: float = 0.3) -> bool:
+def load_transcriber(
+    model_name: str = "large",
+    language: str = "ja",
+    fp32: bool = False,
+    engine: str = "whisper",
+) -> tuple[Callable[[str], np.ndarray], Callable[[np.ndarray], str]]:
     """
-    Very rough heuristic:
-    Return True if at least `threshold` fraction of characters
-    are Japanese (hiragana/katakana/kanji).
+    Load a Whisper model and return two functions:
+      - load_audio(path): decode an audio file into a 16 kHz float32 array
+      - transcribe(audio): transcribe it (forced language, task = transcribe)
+        and return its text
+
+    engine = "whisper":        openai-whisper on CUDA / MPS / CPU, FP16 on GPU
+    engine = "faster-whisper": CTranslate2 with int8 weights and VAD, which
+                               skips silent stretches entirely (CUDA / CPU only)
     """
-    if not text:
-        return False
+    if engine == "faster-whisper":
+        from faster_whisper import WhisperModel, decode_audio
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        if fp32:
+            compute_type = "float32"
+        else:
+            compute_type = "int8_float16" if device == "cuda" else "int8"
+        print(f"🧠 Loading faster-whisper model '{model_name}' on device '{device}' ({compute_type})...")
+        model = WhisperModel(model_name, device=device, compute_type=compute_type)
+
+        def transcribe(audio: np.ndarray) -> str:
+            segments, _info = model.transcribe(
+                audio,
+                language=language,
+                task="transcribe",
+                vad_filter=True,
+            )
+            # segments is a generator; decoding happens while we iterate
+            return "".join(segment.text for segment in segments).strip()
+
+        return decode_audio, transcribe
+
+    import whisper
+
+    if torch.cuda.is_available():
+        device = "cuda"
+    elif torch.backends.mps.is_available():
+        device = "mps"
+    else:
+        device = "cpu"
+    # FP16 halves the bytes moved per matmul on GPU; CPU has no fast FP16 path
+    fp16 = device in ("cuda", "mps") and not fp32
+    print(f"🧠 Loading Whisper model '{model_name}' on device '{device}' ({'fp16' if fp16 else 'fp32'})...")
+    model = whisper.load_model(model_name, device=device)
+
+    def transcribe(audio: np.ndarray) -> str:
+        # No autograd bookkeeping needed for inference
+        with torch.inference_mode():
+            result = model.transcribe(
+                audio,
+                language=language,
+                task="transcribe",
+                fp16=fp16,
+            )
+        return result.get("text", "").strip()
 
-    jp_chars = re.findall(r"[ぁ-んァ-ン一-龯]", text)
-    ratio = len(jp_chars) / max(len(text), 1)
-    return ratio >= threshold
+    return whisper.load_audio, transcribe
 
 
 def transcribe_chunks(
     chunks: list[pathlib.Path],
     model_name: str = "large",
     language: str = "ja",
+    fp32: bool = False,
+    engine: str = "whisper",
 ) -> str:
     """
     Transcribe each chunk with Whisper and return the combined transcript as a string.
     Forces:
       - language = Japanese
       - task = transcribe (no translation)
-    Uses MPS on Apple Silicon if available.
+    With the default engine, uses CUDA or MPS (Apple Silicon) if available,
+    in half precision unless `fp32` is set.
+
+    While one chunk is being transcribed, the next one is decoded on a
+    background thread, so audio loading overlaps with model inference
+    instead of waiting for it (decoding runs outside the GIL, in an
+    ffmpeg subprocess or PyAV).
     """
-    device = "mps" if torch.backends.mps.is_available() else "cpu"
-    print(f"🧠 Loading Whisper model '{model_name}' on device '{device}'...")
-    model = whisper.load_model(model_name, device=device)
+    load_audio, transcribe = load_transcriber(
+        model_name,
+        language=language,
+        fp32=fp32,
+        engine=engine,
+    )
+
+    if not chunks:
+        return ""
 
     all_texts = []
 
-    for i, chunk_path in enumerate(chunks, start=1):
-        print(f"📝 [{i}/{len(chunks)}] Transcribing {chunk_path.name} ...")
-
-        # Force Japanese + transcription mode
-        result = model.transcribe(
-            str(chunk_path),
-            language=language,
-            task="transcribe",
-            fp16=False,
-        )
-        text = result.get("text", "").strip()
-
-        # Optional tiny filter: skip completely non-Japanese gibberish
-        if not text:
-            print("   ↳ (empty result, skipping)")
-            continue
-        if not looks_like_japanese(text):
-            print("   ↳ (looks non-Japanese / noisy, keeping but marking)")
-            all_texts.append(f"\n[? 非日本語っぽいチャンク {i}] {text}\n")
-            continue
-
-        all_texts.append(f"\n----- [Chunk {i}] {chunk_path.name} -----\n{text}\n")
+    with ThreadPoolExecutor(max_workers=1) as loader:
+        next_audio = loader.submit(load_audio, str(chunks[0]))
+
+        for i, chunk_path in enumerate(chunks, start=1):
+            audio = next_audio.result()
+            if i < len(chunks):
+                next_audio = loader.submit(load_audio, str(chunks[i]))
+
+            print(f"📝 [{i}/{len(chunks)}] Transcribing {chunk_path.name} ...")
+
+            # Force Japanese + transcription mode
+            text = transcribe(audio)
+
+            # Optional tiny filter: skip completely non-Japanese gibberish
+            if not text:
+                print("   ↳ (empty result, skipping)")
+                continue
+            if not looks_like_japanese(text):
+                print("   ↳ (looks non-Japanese / noisy, keeping but marking)")
+                all_texts.append(f"\n[? 非日本語っぽいチャンク {i}] {text}\n")
+                continue
+
+            all_texts.append(f"\n----- [Chunk {i}] {chunk_path.name} -----\n{text}\n")
 
     full_text = "\n".join(all_texts).strip()
     return full_text
@@ -130,6 +210,18 @@ def main():
         default="ja",
         help="Language code to force (default: ja for Japanese)",
     )
+    parser.add_argument(
+        "--engine",
+        choices=["whisper", "faster-whisper"],
+        default="whisper",
+        help="Transcription backend: openai-whisper (supports MPS) or "
+             "faster-whisper (int8 CTranslate2 + VAD, CUDA/CPU) (default: whisper)",
+    )
+    parser.add_argument(
+        "--fp32",
+        action="store_true",
+        help="Run Whisper in full precision (slower; for debugging numerical issues)",
+    )
 
     args = parser.parse_args()
 
@@ -146,6 +238,8 @@ def main():
         chunks,
         model_name=args.model,
         language=args.language,
+        fp32=args.fp32,
+        engine=args.engine,
     )
 
     # 3) Save final transcript
@@ -1,66 +1,59 @@
 import argparse
+import asyncio
 import pathlib
-import requests
 
+import aiohttp
 
-def call_ollama(prompt: str,
-                model: str = "llama3.1",
-                host: str = "http://localhost:11434") -> str:
-    url = f"{host}/api/generate"
-    payload = {
-        "model": model,
-        "prompt": prompt,
-        "stream": False,
-    }
-    resp = requests.post(url, json=payload, timeout=600)
-    resp.raise_for_status()
-    data = resp.json()
-    return data.get("response", "").strip()
+from llm_cache import ResponseCache, SemanticCache, add_cache_arguments, cache_namespace
+from llm_client import (
+    add_backend_arguments,
+    cached_response,
+    call_llm,
+    open_session,
+    resolve_base_url,
+    set_response_cache,
+)
+from text_utils import looks_like_japanese
 
 
-def load_text(path: pathlib.Path) -> str:
-    return path.read_text(encoding="utf-8")
+# Short chunks without Japanese in them are passed through untranslated
+MIN_TRANSLATE_CHARS = 40
 
+# Static instructions first so every chunk shares the same
+# prompt prefix (and the server's prompt/KV cache); the chunk and the
+# short static suffix follow.
+TRANSLATE_INSTRUCTIONS = """You are a careful bilingual assistant.
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Translate a Japanese text file into English using a local Ollama model."
-    )
-    parser.add_argument(
-        "input_file",
-        type=str,
-        help="Path to the Japanese .txt file (e.g., Week 7_transcript_ja.txt)",
-    )
-    parser.add_argument(
-        "--model",
-        type=str,
-        default="llama3.1",
-        help="Ollama model name (default: llama3.1)",
-    )
-    parser.add_argument(
-        "--host",
-        type=str,
-        default="http://localhost:11434",
-        help="Ollama host URL (default: http://localhost:11434)",
-    )
-    parser.add_argument(
-        "--max-chars",
-        type=int,
-        default=3500,
-        help="Approximate max characters per translation chunk (default: 3500)",
-    )
+Translate the following Japanese academic text into clear, natural English.
+It is a university lecture transcript or notes.
 
-    args = parser.parse_args()
+Requirements:
+- Preserve technical terms (names, places, era names) accurately.
+- Use full sentences.
+- Keep paragraph breaks where it makes sense.
+- Do NOT summarize; translate as faithfully as possible.
+- Do NOT add explanations or comments, just the translation.
+"""
 
-    input_path = pathlib.Path(args.input_file)
-    if not input_path.exists():
-        print(f"File not found: {input_path}")
-        return
+_TRANSLATE_TMPL = TRANSLATE_INSTRUCTIONS + """
+[Japanese text begins]
+{chunk}
+[Japanese text ends]
+
+Now provide the English translation:
+"""
+
+
+def load_text(path: pathlib.Path) -> str:
+    return path.read_text(encoding="utf-8")
 
-    jp_text = load_text(input_path)
 
-    # Simple manual chunking so we don't blow context limit
-    text = jp_text.replace("\r\n", "\n").replace("\r", "\n")
+def chunk_paragraphs(text: str, max_chars: int = 3500) -> list[str]:
+    """
+    Group paragraphs into chunks of roughly `max_chars` characters
+    so we don't blow the model's context limit.
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
     paragraphs = text.split("\n\n")
     chunks = []
     current = []
@@ -70,7 +63,7 @@ def main():
         para = para.strip()
         if not para:
             continue
-        if cur_len + len(para) + 2 > args.max_chars and current:
+        if cur_len + len(para) + 2 > max_chars and current:
             chunks.append("\n\n".join(current))
             current = [para]
             cur_len = len(para) + 2
@@ -81,31 +74,78 @@ def main():
     if current:
         chunks.append("\n\n".join(current))
 
-    print(f"🔤 Translating {len(chunks)} chunk(s) JP → EN ...")
-
-    translated_chunks = []
-    for i, ch in enumerate(chunks, start=1):
-        print(f"  → Chunk {i}/{len(chunks)}")
-        prompt = f"""You are a careful bilingual assistant.
-
-Translate the following Japanese academic text into clear, natural English.
-It is a university lecture transcript or notes.
-
-Requirements:
-- Preserve technical terms (names, places, era names) accurately.
-- Use full sentences.
-- Keep paragraph breaks where it makes sense.
-- Do NOT summarize; translate as faithfully as possible.
-- Do NOT add explanations or comments, just the translation.
+    return chunks
+
+
+async def translate_chunk(session: aiohttp.ClientSession,
+                          chunk: str,
+                          model: str,
+                          host: str,
+                          cache: SemanticCache | None = None) -> str:
+    """
+    Translate one Japanese chunk into English.
+    If a semantic cache is given, a near-identical earlier chunk's
+    translation is reused instead of calling the model.
+    Short chunks with no Japanese to translate are returned unchanged.
+    """
+    if len(chunk.strip()) < MIN_TRANSLATE_CHARS and not looks_like_japanese(chunk):
+        print("    ↳ (nothing to translate, keeping as is)")
+        return chunk
+
+    prompt = _TRANSLATE_TMPL.format(chunk=chunk)
+
+    # The exact-match cache is a single hash lookup; only embed on a miss.
+    # Embedding runs in a worker thread so other requests keep streaming.
+    semantic = cache is not None and cached_response(model, prompt) is None
+    if semantic:
+        cached = await asyncio.to_thread(cache.get, chunk)
+        if cached is not None:
+            print("    ↳ (semantic cache hit)")
+            return cached
+
+    en = await call_llm(session, prompt, model=model, host=host)
+    if semantic:
+        await asyncio.to_thread(cache.put, chunk, en)
+    return en
+
+
+async def main_async(args: argparse.Namespace, input_path: pathlib.Path) -> None:
+    jp_text = load_text(input_path)
+    chunks = chunk_paragraphs(jp_text, max_chars=args.max_chars)
+    host = resolve_base_url(args)
+    concurrency = max(1, args.concurrency)
 
-[Japanese text begins]
-{ch}
-[Japanese text ends]
+    print(f"🔤 Translating {len(chunks)} chunk(s) JP → EN ...")
 
-Now provide the English translation:
-"""
-        en = call_ollama(prompt, model=args.model, host=args.host)
-        translated_chunks.append(en)
+    if not args.no_cache:
+        set_response_cache(ResponseCache())
+
+    cache = None
+    if args.semantic_cache:
+        cache = SemanticCache(
+            input_path.parent / "nanishiteru_cache.sqlite",
+            namespace=cache_namespace(args.model, _TRANSLATE_TMPL),
+        )
+
+    # Every chunk is its own task; the semaphore caps how many POSTs are
+    # in flight and gather() returns the translations in chunk order.
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int, chunk: str) -> str:
+        async with semaphore:
+            print(f"  → Chunk {i}/{len(chunks)}")
+            return await translate_chunk(
+                session, chunk, model=args.model, host=host, cache=cache
+            )
+
+    try:
+        async with open_session(concurrency) as session:
+            translated_chunks = await asyncio.gather(
+                *(worker(i, chunk) for i, chunk in enumerate(chunks, start=1))
+            )
+    finally:
+        if cache is not None:
+            cache.close()
 
     out_path = input_path.with_name(input_path.stem + "_EN.txt")
     out_path.write_text("\n\n".join(translated_chunks), encoding="utf-8")
@@ -114,5 +154,39 @@ Now provide the English translation:
     print(f"Translated file saved to: {out_path}")
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Translate a Japanese text file into English using a local LLM server (Ollama or vLLM)."
+    )
+    parser.add_argument(
+        "input_file",
+        type=str,
+        help="Path to the Japanese .txt file (e.g., Week 7_transcript_ja.txt)",
+    )
+    add_backend_arguments(parser)
+    parser.add_argument(
+        "--max-chars",
+        type=int,
+        default=3500,
+        help="Approximate max characters per translation chunk (default: 3500)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Max number of chunks translated in parallel (default: 4)",
+    )
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+
+    input_path = pathlib.Path(args.input_file)
+    if not input_path.exists():
+        print(f"File not found: {input_path}")
+        return
+
+    asyncio.run(main_async(args, input_path))
+
+
 if __name__ == "__main__":
     main()